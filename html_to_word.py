@@ -22,8 +22,55 @@ HTML to Word Converter - Complete Styling Solution
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from html import unescape
 from html.parser import HTMLParser
 from io import StringIO
+from typing import NamedTuple
+import re
+import threading
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+# Namespace-qualified attribute names resolved once at import; qn() does
+# a prefix-map lookup plus string formatting on every call
+_QN = {name: qn(f'w:{name}') for name in ('val', 'sz', 'space', 'color', 'ascii', 'hAnsi')}
+_QN_XML_SPACE = qn('xml:space')
+_QN_SECT_PR = qn('w:sectPr')
+_BORDER_NAMES = ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+
+# Single C-level sweep over the markup: each match is either a tag
+# (groups 1-2: closing slash, tag name) or a text chunk (group 3).
+# HTMLParser's char-at-a-time state machine stays as the fallback for
+# input this pattern doesn't fully cover (comments, CDATA, stray '<',
+# and quoted attribute values - a '>' inside quotes would mis-split the
+# tag, so any quote in a tag forces the fallback; the handlers ignore
+# attributes, so the fallback result is identical).
+_TOKEN_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>"\']*>|([^<]+)')
+
+# One reusable converter per thread (see html_to_word)
+_CONVERTER_TLS = threading.local()
+
+# Constant lengths folded at import; Inches/Pt do arithmetic and allocate
+# a Length object on every call
+_INDENT_HALF = Inches(0.5)
+_DEFAULT_SIZE = Pt(11)
+
+
+class RunStyle(NamedTuple):
+    """Formatting inherited from a placeholder location
+
+    A NamedTuple rather than a dict: immutable (so the default can be
+    shared, not copied), smaller, and attribute access beats hashed
+    lookups in the per-run hot path.
+    """
+    font_name: str = 'Arial'
+    font_size: Pt = _DEFAULT_SIZE
+    bold: bool = False
+    italic: bool = False
+
+
+_DEFAULT_STYLE = RunStyle()
 
 
 class HTMLToWordConverter(HTMLParser):
@@ -31,20 +78,24 @@ class HTMLToWordConverter(HTMLParser):
 
     def __init__(self, doc, parent_element=None, style_info=None):
         super().__init__()
+        self.parent_element = parent_element
+        self.rebind(doc, style_info)
+
+    def rebind(self, doc, style_info=None):
+        """Point the converter at a new target document and reset all
+        per-document state (lets html_to_word reuse one instance instead
+        of paying HTMLParser.__init__ per placeholder value)"""
         self.doc = doc
         self.current_paragraph = None
         self.current_run = None
-        self.parent_element = parent_element
 
         # Style information to inherit from placeholder
-        self.style_info = style_info or {
-            'font_name': 'Arial',
-            'font_size': Pt(11),
-            'bold': False,
-            'italic': False,
-        }
-
-        # State tracking
+        self.style_info = style_info or _DEFAULT_STYLE
+
+        self._reset_state()
+
+    def _reset_state(self):
+        """Clear parse-state tracking fields"""
         self.in_bold = False
         self.in_italic = False
         self.in_list = False
@@ -53,115 +104,147 @@ class HTMLToWordConverter(HTMLParser):
         self.table_rows = []
         self.current_row = []
         self.in_header = False
-        
+
+
+    def fast_feed(self, html_content):
+        """
+        Drive the tag handlers from one compiled-regex pass instead of
+        HTMLParser.feed's per-character callbacks
+
+        Returns False (without emitting anything) when the input contains
+        markup the tokenizer doesn't understand, so the caller can fall
+        back to the full parser.
+        """
+        tokens = []
+        pos = 0
+        for m in _TOKEN_RE.finditer(html_content):
+            if m.start() != pos:
+                return False
+            pos = m.end()
+            tokens.append(m)
+
+        if pos != len(html_content):
+            return False
+
+        for m in tokens:
+            text = m.group(3)
+            if text is not None:
+                self.handle_data(unescape(text))
+            elif m.group(1):
+                self.handle_endtag(m.group(2).lower())
+            else:
+                self.handle_starttag(m.group(2).lower(), [])
+        return True
+
     def handle_starttag(self, tag, attrs):
-        """Handle opening HTML tags"""
-        
-        if tag == 'p':
-            self.current_paragraph = self.doc.add_paragraph()
-            
-        elif tag == 'br':
-            if self.current_paragraph:
-                self.current_paragraph.add_run().add_break()
-                
-        elif tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            # Try to use heading style, fallback to bold paragraph
-            level = int(tag[1])
-            self.current_paragraph = self.doc.add_paragraph()
-            
-            try:
-                # Try to apply heading style
-                style_name = f'Heading {level}'
-                self.current_paragraph.style = style_name
-            except KeyError:
-                # Style doesn't exist, use bold formatting instead
-                self.current_paragraph.runs[0].bold = True if self.current_paragraph.runs else None
-                # We'll apply bold in handle_data
-                self.in_bold = True
-            
-        elif tag == 'strong' or tag == 'b':
-            self.in_bold = True
-            
-        elif tag == 'em' or tag == 'i':
-            self.in_italic = True
-            
-        elif tag == 'ol' or tag == 'ul':
-            self.in_list = True
-            self.list_items = []
-            
-        elif tag == 'li':
-            pass
-            
-        elif tag == 'table':
-            self.in_table = True
-            self.table_rows = []
-            
-        elif tag == 'tr':
-            self.current_row = []
-            
-        elif tag == 'th':
-            self.in_header = True
-            
-        elif tag == 'td' or tag == 'th':
-            pass
-    
+        """Handle opening HTML tags (O(1) dict dispatch)"""
+        handler = _START_HANDLERS.get(tag)
+        if handler:
+            handler(self, tag)
+
     def handle_endtag(self, tag):
-        """Handle closing HTML tags"""
-        
-        if tag == 'p':
-            self.current_paragraph = None
-            
-        elif tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            self.in_bold = False
-            self.current_paragraph = None
-            
-        elif tag == 'strong' or tag == 'b':
-            self.in_bold = False
-            
-        elif tag == 'em' or tag == 'i':
-            self.in_italic = False
-            
-        elif tag == 'ol':
-            # Add ordered list
-            for i, item in enumerate(self.list_items, 1):
-                p = self.doc.add_paragraph(f"{i}. {item}")
-                p.paragraph_format.left_indent = Inches(0.5)
-                # Apply inherited style
-                for run in p.runs:
-                    self._apply_style_to_run(run)
-            self.in_list = False
-            self.list_items = []
-
-        elif tag == 'ul':
-            # Add unordered list - use bullet character instead of style
-            for item in self.list_items:
-                p = self.doc.add_paragraph(f"• {item}")
-                p.paragraph_format.left_indent = Inches(0.5)
-                # Apply inherited style
-                for run in p.runs:
-                    self._apply_style_to_run(run)
-            self.in_list = False
-            self.list_items = []
-            
-        elif tag == 'tr':
-            if self.current_row:
-                self.table_rows.append(self.current_row)
-            self.current_row = []
-            
-        elif tag == 'th':
-            self.in_header = False
-            
-        elif tag == 'table':
-            if self.table_rows:
-                self._create_table()
-            self.in_table = False
-            self.table_rows = []
+        """Handle closing HTML tags (O(1) dict dispatch)"""
+        handler = _END_HANDLERS.get(tag)
+        if handler:
+            handler(self, tag)
+
+    # --- start-tag handlers (dispatched via _START_HANDLERS) ---
+
+    def _start_p(self, tag):
+        self.current_paragraph = self.doc.add_paragraph()
+
+    def _start_br(self, tag):
+        if self.current_paragraph:
+            self.current_paragraph.add_run().add_break()
+
+    def _start_heading(self, tag):
+        # Try to use heading style, fallback to bold paragraph
+        self.current_paragraph = self.doc.add_paragraph()
+        try:
+            self.current_paragraph.style = _HEADING_STYLES[int(tag[1]) - 1]
+        except KeyError:
+            # Style doesn't exist; the paragraph was just created so it
+            # has no runs yet - bold is applied in handle_data instead
+            self.in_bold = True
+
+    def _start_bold(self, tag):
+        self.in_bold = True
+
+    def _start_italic(self, tag):
+        self.in_italic = True
+
+    def _start_list(self, tag):
+        self.in_list = True
+        self.list_items = []
+
+    def _start_table(self, tag):
+        self.in_table = True
+        self.table_rows = []
+
+    def _start_tr(self, tag):
+        self.current_row = []
+
+    def _start_th(self, tag):
+        self.in_header = True
+
+    # --- end-tag handlers (dispatched via _END_HANDLERS) ---
+
+    def _end_p(self, tag):
+        self.current_paragraph = None
+
+    def _end_heading(self, tag):
+        self.in_bold = False
+        self.current_paragraph = None
+
+    def _end_bold(self, tag):
+        self.in_bold = False
+
+    def _end_italic(self, tag):
+        self.in_italic = False
+
+    def _end_ol(self, tag):
+        # Add ordered list
+        for i, item in enumerate(self.list_items, 1):
+            p = self.doc.add_paragraph(f"{i}. {item}")
+            p.paragraph_format.left_indent = _INDENT_HALF
+            # Apply inherited style
+            for run in p.runs:
+                self._apply_style_to_run(run)
+        self.in_list = False
+        self.list_items = []
+
+    def _end_ul(self, tag):
+        # Add unordered list - use bullet character instead of style
+        for item in self.list_items:
+            p = self.doc.add_paragraph(f"• {item}")
+            p.paragraph_format.left_indent = _INDENT_HALF
+            # Apply inherited style
+            for run in p.runs:
+                self._apply_style_to_run(run)
+        self.in_list = False
+        self.list_items = []
+
+    def _end_tr(self, tag):
+        if self.current_row:
+            self.table_rows.append(self.current_row)
+        self.current_row = []
+
+    def _end_th(self, tag):
+        self.in_header = False
+
+    def _end_table(self, tag):
+        if self.table_rows:
+            self._create_table()
+        self.in_table = False
+        self.table_rows = []
     
     def handle_data(self, data):
         """Handle text content"""
-        data = data.strip()
-        if not data:
+        # isspace() rejects the common inter-tag whitespace chunks without
+        # allocating the stripped copy
+        if not data or data.isspace():
             return
+        data = data.strip()
 
         if self.in_list:
             self.list_items.append(data)
@@ -192,59 +275,120 @@ class HTMLToWordConverter(HTMLParser):
 
     def _apply_style_to_run(self, run):
         """Apply inherited style information to a run"""
-        if self.style_info:
-            if self.style_info.get('font_name'):
-                run.font.name = self.style_info['font_name']
-            if self.style_info.get('font_size'):
-                run.font.size = self.style_info['font_size']
-            # Don't apply bold/italic from style_info, those are for the placeholder itself
+        style = self.style_info
+        if style.font_name:
+            run.font.name = style.font_name
+        if style.font_size:
+            run.font.size = style.font_size
+        # Don't apply bold/italic from style_info, those are for the placeholder itself
     
     def _create_table(self):
         """Create Word table from collected data with borders"""
         if not self.table_rows:
             return
 
-        num_rows = len(self.table_rows)
         num_cols = max(len(row) for row in self.table_rows)
 
-        table = self.doc.add_table(rows=num_rows, cols=num_cols)
+        # Build the whole <w:tbl> subtree with raw oxml and append it to
+        # the body once, instead of going through doc.add_table and the
+        # per-cell python-docx wrappers (each of which re-resolves styles
+        # and namespaces)
+        font_name = self.style_info.font_name
+        font_size = self.style_info.font_size
+        sz_val = str(int(font_size.pt * 2)) if font_size else None
 
-        # Set table style with borders
-        from docx.oxml import OxmlElement
-        from docx.oxml.ns import qn
+        tbl = OxmlElement('w:tbl')
+        tblPr = OxmlElement('w:tblPr')
 
-        # Add table borders using XML
-        tbl = table._element
-        tblPr = tbl.tblPr
-        if tblPr is None:
-            tblPr = OxmlElement('w:tblPr')
-            tbl.insert(0, tblPr)
-
-        # Create table borders element
+        # Table borders: black single line on all sides
         tblBorders = OxmlElement('w:tblBorders')
-        for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+        for border_name in _BORDER_NAMES:
             border = OxmlElement(f'w:{border_name}')
-            border.set(qn('w:val'), 'single')
-            border.set(qn('w:sz'), '4')  # Border size
-            border.set(qn('w:space'), '0')
-            border.set(qn('w:color'), '000000')  # Black border
+            border.set(_QN['val'], 'single')
+            border.set(_QN['sz'], '4')  # Border size
+            border.set(_QN['space'], '0')
+            border.set(_QN['color'], '000000')  # Black border
             tblBorders.append(border)
-
         tblPr.append(tblBorders)
+        tbl.append(tblPr)
+
+        tblGrid = OxmlElement('w:tblGrid')
+        for _ in range(num_cols):
+            tblGrid.append(OxmlElement('w:gridCol'))
+        tbl.append(tblGrid)
 
-        # Fill table
         for row_idx, row_data in enumerate(self.table_rows):
-            for col_idx, cell_data in enumerate(row_data):
-                cell = table.rows[row_idx].cells[col_idx]
-                cell.text = cell_data
+            tr = OxmlElement('w:tr')
+            for col_idx in range(num_cols):
+                tc = OxmlElement('w:tc')
+                p = OxmlElement('w:p')
+                r = OxmlElement('w:r')
+
+                # Inherited style + bold header row, written directly as rPr
+                rPr = OxmlElement('w:rPr')
+                if font_name:
+                    rFonts = OxmlElement('w:rFonts')
+                    rFonts.set(_QN['ascii'], font_name)
+                    rFonts.set(_QN['hAnsi'], font_name)
+                    rPr.append(rFonts)
+                if row_idx == 0:
+                    rPr.append(OxmlElement('w:b'))
+                if sz_val:
+                    sz = OxmlElement('w:sz')
+                    sz.set(_QN['val'], sz_val)
+                    rPr.append(sz)
+                if len(rPr):
+                    r.append(rPr)
+
+                t = OxmlElement('w:t')
+                t.set(_QN_XML_SPACE, 'preserve')
+                t.text = row_data[col_idx] if col_idx < len(row_data) else ''
+                r.append(t)
+                p.append(r)
+                tc.append(p)
+                tr.append(tc)
+            tbl.append(tr)
+
+        # Insert before the body's sectPr (CT_Body requires it last, and
+        # content appended after it lands out of document order)
+        body = self.doc.element.body
+        sectPr = body.find(_QN_SECT_PR)
+        if sectPr is not None:
+            sectPr.addprevious(tbl)
+        else:
+            body.append(tbl)
+
+
+# Heading style names precomputed so the handler doesn't format one per tag
+_HEADING_STYLES = tuple(f'Heading {level}' for level in range(1, 7))
 
-                # Apply inherited style to cell text
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        self._apply_style_to_run(run)
-                        # Bold header row
-                        if row_idx == 0:
-                            run.bold = True
+# Tag dispatch tables: one dict lookup replaces the old elif ladders
+_C = HTMLToWordConverter
+_START_HANDLERS = {
+    'p': _C._start_p,
+    'br': _C._start_br,
+    'h1': _C._start_heading, 'h2': _C._start_heading, 'h3': _C._start_heading,
+    'h4': _C._start_heading, 'h5': _C._start_heading, 'h6': _C._start_heading,
+    'strong': _C._start_bold, 'b': _C._start_bold,
+    'em': _C._start_italic, 'i': _C._start_italic,
+    'ol': _C._start_list, 'ul': _C._start_list,
+    'table': _C._start_table,
+    'tr': _C._start_tr,
+    'th': _C._start_th,
+}
+_END_HANDLERS = {
+    'p': _C._end_p,
+    'h1': _C._end_heading, 'h2': _C._end_heading, 'h3': _C._end_heading,
+    'h4': _C._end_heading, 'h5': _C._end_heading, 'h6': _C._end_heading,
+    'strong': _C._end_bold, 'b': _C._end_bold,
+    'em': _C._end_italic, 'i': _C._end_italic,
+    'ol': _C._end_ol,
+    'ul': _C._end_ul,
+    'tr': _C._end_tr,
+    'th': _C._end_th,
+    'table': _C._end_table,
+}
+del _C
 
 
 def html_to_word(html_content, doc, style_info=None):
@@ -254,15 +398,24 @@ def html_to_word(html_content, doc, style_info=None):
     Args:
         html_content: HTML string to convert
         doc: python-docx Document object
-        style_info: Optional dict with font_name, font_size, bold, italic
+        style_info: Optional RunStyle with font_name, font_size, bold, italic
     """
     if not html_content or html_content == "null":
         return
 
-    parser = HTMLToWordConverter(doc, style_info=style_info)
+    # Reuse one converter per thread; HTMLParser.__init__ is not free and
+    # this function runs once per HTML placeholder value
+    parser = getattr(_CONVERTER_TLS, 'converter', None)
+    if parser is None:
+        parser = HTMLToWordConverter(doc, style_info=style_info)
+        _CONVERTER_TLS.converter = parser
+    else:
+        parser.reset()  # HTMLParser internals (buffers, line numbers)
+        parser.rebind(doc, style_info)
 
     try:
-        parser.feed(html_content)
+        if not parser.fast_feed(html_content):
+            parser.feed(html_content)
     except Exception as e:
         print(f"⚠️  Warning: HTML parsing error: {e}")
         # Fallback: add as plain text
@@ -270,7 +423,7 @@ def html_to_word(html_content, doc, style_info=None):
         # Apply style to fallback paragraph
         if style_info and para.runs:
             for run in para.runs:
-                if style_info.get('font_name'):
-                    run.font.name = style_info['font_name']
-                if style_info.get('font_size'):
-                    run.font.size = style_info['font_size']
\ No newline at end of file
+                if style_info.font_name:
+                    run.font.name = style_info.font_name
+                if style_info.font_size:
+                    run.font.size = style_info.font_size
\ No newline at end of file
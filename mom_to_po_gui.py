@@ -7,8 +7,11 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import json
+import threading
 from pathlib import Path
-from word_generator import WordGenerator
+
+# WordGenerator (and with it python-docx/lxml) is imported lazily in
+# _generate_word so the window paints without paying for the docx stack
 
 
 class MOMtoPOApp:
@@ -19,6 +22,9 @@ class MOMtoPOApp:
         self.root.title("MOM to PO Generator v3.0")
         self.root.geometry("800x600")
         
+        # Buffered log lines, flushed to the Text widget on a timer
+        self._log_buf = []
+
         # Variables
         self.template_path = tk.StringVar()
         self.mom_pdf_path = tk.StringVar()
@@ -27,6 +33,9 @@ class MOMtoPOApp:
         
         # Setup UI
         self._setup_ui()
+
+        # Start the log flush timer
+        self.root.after(100, self._flush_log)
     
     def _setup_ui(self):
         """Setup GUI layout"""
@@ -77,13 +86,13 @@ class MOMtoPOApp:
         )
         
         # Generate button
-        generate_btn = ttk.Button(
-            main_frame, 
-            text="Generate Word Document", 
+        self.generate_btn = ttk.Button(
+            main_frame,
+            text="Generate Word Document",
             command=self._generate_word,
             style="Accent.TButton"
         )
-        generate_btn.grid(row=3, column=0, columnspan=3, pady=30)
+        self.generate_btn.grid(row=3, column=0, columnspan=3, pady=30)
         
         # Status log
         ttk.Label(main_frame, text="Log:").grid(
@@ -122,68 +131,104 @@ class MOMtoPOApp:
             self.output_dir.set(dirname)
     
     def _log(self, message):
-        """Add message to log"""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update()
+        """Add message to log (buffered; the flush timer writes it out)"""
+        self._log_buf.append(message)
+
+    def _flush_log(self):
+        """Flush buffered log lines to the Text widget in one insert"""
+        if self._log_buf:
+            self.log_text.insert(tk.END, "\n".join(self._log_buf) + "\n")
+            self._log_buf.clear()
+            self.log_text.see(tk.END)
+            self.root.update_idletasks()
+        self.root.after(100, self._flush_log)
     
+    def _open_file(self, path):
+        """Open a file with the OS default application"""
+        if os.name == 'nt':
+            os.startfile(path)
+        else:
+            # Direct exec - no shell fork, no quoting issues on odd paths
+            import subprocess
+            import sys
+            opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+            subprocess.Popen([opener, str(path)])
+
     def _generate_word(self):
-        """Generate Word document from Step 3 JSON"""
-        
+        """Validate inputs and run generation on a worker thread"""
+
         # Validate inputs
         if not self.step3_json_path.get():
             messagebox.showerror("Error", "Please select Step 3 HTML JSON file")
             return
-        
+
         if not os.path.exists(self.step3_json_path.get()):
             messagebox.showerror("Error", "Step 3 JSON file not found")
             return
-        
+
         # Create output directory
         os.makedirs(self.output_dir.get(), exist_ok=True)
-        
+
+        # Keep the Tk main thread free while docx generation runs; _log is
+        # safe from the worker because it only appends to the buffer
+        self.generate_btn.config(state=tk.DISABLED)
+        threading.Thread(target=self._do_generate, daemon=True).start()
+
+    def _do_generate(self):
+        """Generate Word document from Step 3 JSON (worker thread)"""
         try:
             self._log("=" * 50)
             self._log("Starting Word document generation...")
-            
+
             # Load JSON to get PO number for filename
             with open(self.step3_json_path.get(), 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
+
             po_no = data.get('html_data', {}).get('PO_NO', 'Unknown')
             output_filename = f"PO_{po_no}.docx"
             output_path = os.path.join(self.output_dir.get(), output_filename)
-            
+
             self._log(f"PO Number: {po_no}")
             self._log(f"Output: {output_path}")
-            
+
             # Generate Word document
+            from word_generator import WordGenerator
             generator = WordGenerator(self.template_path.get() if self.template_path.get() else None)
-            
+
             if self.template_path.get() and os.path.exists(self.template_path.get()):
                 self._log("Using template mode...")
                 generator.generate_with_template(
                     self.template_path.get(),
                     self.step3_json_path.get(),
-                    output_path
+                    output_path,
+                    data=data
                 )
             else:
                 self._log("Using default mode (no template)...")
                 generator.generate_from_html_json(
                     self.step3_json_path.get(),
-                    output_path
+                    output_path,
+                    data=data
                 )
-            
+
             self._log("✅ Word document generated successfully!")
             self._log(f"📄 File: {output_path}")
-            
-            # Ask to open file
-            if messagebox.askyesno("Success", "Word document generated!\n\nOpen file?"):
-                os.startfile(output_path)
-        
+
+            self.root.after(0, self._on_generate_done, output_path)
+
         except Exception as e:
             self._log(f"❌ Error: {str(e)}")
-            messagebox.showerror("Error", f"Failed to generate Word document:\n{str(e)}")
+            self.root.after(
+                0, messagebox.showerror,
+                "Error", f"Failed to generate Word document:\n{str(e)}"
+            )
+        finally:
+            self.root.after(0, self.generate_btn.config, {'state': tk.NORMAL})
+
+    def _on_generate_done(self, output_path):
+        """Success dialog + optional open, back on the main thread"""
+        if messagebox.askyesno("Success", "Word document generated!\n\nOpen file?"):
+            self._open_file(output_path)
 
     
 # Run application
@@ -23,13 +23,54 @@ Word Document Generator - Complete Placeholder & Styling Solution
 """
 
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.shared import Pt, Inches
+from docx.text.paragraph import Paragraph
 from docx.oxml import parse_xml
 from docx.oxml.ns import nsdecls
+from lxml import etree
+import functools
 import json
 import os
 import re
-from html_to_word import html_to_word
+from html_to_word import html_to_word, RunStyle
+from json_validator import validate_and_fix_json_file
+
+_W_NS = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+
+# Ultimate-fallback formatting for placeholder locations that carry
+# none; Pt() builds a Length object, so fold it once here rather than
+# per _extract_paragraph_style call
+_DEFAULT_FONT_NAME = 'Arial'
+_DEFAULT_FONT_SIZE = Pt(11)
+
+# Compiled once; evaluating it gathers every w:t text node in one C call
+_PARA_TEXT_XPATH = etree.XPath('.//w:t/text()', namespaces=_W_NS)
+
+# Every paragraph under the body - top level and inside table cells alike
+_ALL_PARAS_XPATH = etree.XPath('.//w:p', namespaces=_W_NS)
+
+
+def _para_text(paragraph):
+    """paragraph.text without python-docx's per-run Python-level walk"""
+    return ''.join(_PARA_TEXT_XPATH(paragraph._element))
+
+
+def _snip(text, limit=80):
+    """Truncate for log output; no copy when already short"""
+    return text if len(text) <= limit else text[:limit]
+
+
+@functools.lru_cache(maxsize=32)
+def _load_validated(path, mtime):
+    """
+    Cached JSON load + validation
+
+    The mtime argument only serves to key the cache: a changed file gets
+    a fresh entry, so workflows producing several documents from the
+    same source JSON validate it once.
+    """
+    return validate_and_fix_json_file(path)
 
 
 class WordGenerator:
@@ -37,8 +78,45 @@ class WordGenerator:
     
     # Define which fields are simple text (inline) vs complex HTML (block)
     SIMPLE_FIELDS = ['PO_NO', 'MOM_DATE', 'DELIVERY_TERMS']
+
+    # Compiled once at class build; re's internal cache is LRU-bounded and
+    # keyed by pattern string, so relying on it hides recompilation cost
+    # on the per-paragraph hot path
+    _PLACEHOLDER_RE = re.compile(r'\{\{([A-Z_]+)\}\}')
+
+    # The simple-field vocabulary is fixed, so the inline-replacement
+    # alternation is specialized here once rather than rebuilt from the
+    # found placeholders on every paragraph
+    _SIMPLE_RE = re.compile(r'\{\{(' + '|'.join(map(re.escape, SIMPLE_FIELDS)) + r')\}\}')
+
+    # Lazily-built cache of '{{NAME}}' tag strings shared by all
+    # instances; rebuilding the five-brace f-string per placeholder per
+    # paragraph is pure interpreter overhead
+    _TAG_CACHE = {}
+
+    # Section order for no-template generation: (heading, html_data field).
+    # Data, not branches — extend by adding a row.
+    SECTION_FIELDS = [
+        ('Payment Terms', 'PAYMENT_FULL'),
+        ('Warranty', 'WARRANTY'),
+        ('Liquidated Damages', 'LIQUIDATED_DAMAGES'),
+        ('Bond Requirements', 'BOND_FULL'),
+        (None, 'DELIVERY_TERMS'),  # rendered inline, not as a section
+        ('Optional Items', 'OPTIONAL_FULL'),
+        ('Supervision & Training', 'SUPERVISION_SHOP_TRAINING'),
+        ('Special Notes', 'SPECIAL_NOTE'),
+        ('Attachments', 'ATTACHMENT_FULL'),
+    ]
     
     def __init__(self, template_path=None):
+        # Per-paragraph debug logging; each print is a stdout write and
+        # flush, which dominates wall time on big templates when enabled
+        self.verbose = os.environ.get('PO_VERBOSE', '') not in ('', '0')
+
+        # Scratch Document reused by _insert_complex_placeholders;
+        # created lazily because most runs never render HTML blocks
+        self._temp_doc = None
+
         if template_path and os.path.exists(template_path):
             self.doc = Document(template_path)
         else:
@@ -68,7 +146,6 @@ class WordGenerator:
             try:
                 self.doc.styles[style_name]
             except KeyError:
-                from docx.enum.style import WD_STYLE_TYPE
                 style = self.doc.styles.add_style(
                     style_name, 
                     WD_STYLE_TYPE.PARAGRAPH
@@ -76,12 +153,15 @@ class WordGenerator:
                 style.font.bold = True
                 style.font.size = Pt(16 - level * 2)
     
-    def generate_from_html_json(self, html_json_path, output_path):
-        """Generate Word document without template"""
-        print(f"📂 Loading JSON from: {html_json_path}")
-        
-        from json_validator import validate_and_fix_json_file
-        data = validate_and_fix_json_file(html_json_path)
+    def generate_from_html_json(self, html_json_path, output_path, data=None):
+        """Generate Word document without template
+
+        Pass data to reuse an already-parsed JSON dict and skip the
+        disk read + validation.
+        """
+        if data is None:
+            print(f"📂 Loading JSON from: {html_json_path}")
+            data = _load_validated(html_json_path, os.path.getmtime(html_json_path))
         html_data = data.get('html_data', {})
         
         if not html_data:
@@ -92,21 +172,15 @@ class WordGenerator:
         self.doc.add_heading('Purchase Order', 0)
         self._add_header_info(html_data)
         
-        self._add_section('Payment Terms', html_data.get('PAYMENT_FULL', ''))
-        self._add_section('Warranty', html_data.get('WARRANTY', ''))
-        self._add_section('Liquidated Damages', html_data.get('LIQUIDATED_DAMAGES', ''))
-        self._add_section('Bond Requirements', html_data.get('BOND_FULL', ''))
-        
-        if html_data.get('DELIVERY_TERMS'):
-            p = self.doc.add_paragraph()
-            p.add_run('Delivery Terms: ').bold = True
-            p.add_run(html_data.get('DELIVERY_TERMS', ''))
-            self.doc.add_paragraph()
-        
-        self._add_section('Optional Items', html_data.get('OPTIONAL_FULL', ''))
-        self._add_section('Supervision & Training', html_data.get('SUPERVISION_SHOP_TRAINING', ''))
-        self._add_section('Special Notes', html_data.get('SPECIAL_NOTE', ''))
-        self._add_section('Attachments', html_data.get('ATTACHMENT_FULL', ''))
+        for title, field in self.SECTION_FIELDS:
+            if title is None:
+                if html_data.get(field):
+                    p = self.doc.add_paragraph()
+                    p.add_run('Delivery Terms: ').bold = True
+                    p.add_run(html_data.get(field, ''))
+                    self.doc.add_paragraph()
+            else:
+                self._add_section(title, html_data.get(field, ''))
         
         self.doc.save(output_path)
         print(f"✅ Word document saved: {output_path}")
@@ -140,38 +214,49 @@ class WordGenerator:
         
         self.doc.add_paragraph()
     
-    def generate_with_template(self, template_path, html_json_path, output_path):
+    def generate_with_template(self, template_path, html_json_path, output_path, data=None):
         """
         Generate Word using template with {{placeholders}}
         PROPERLY handles inline replacement and HTML conversion
+
+        Pass data to reuse an already-parsed JSON dict and skip the
+        disk read + validation.
         """
         print(f"📂 Loading template: {template_path}")
         self.doc = Document(template_path)
-        
-        print(f"📂 Loading JSON: {html_json_path}")
-        from json_validator import validate_and_fix_json_file
-        data = validate_and_fix_json_file(html_json_path)
+
+        if data is None:
+            print(f"📂 Loading JSON: {html_json_path}")
+            data = _load_validated(html_json_path, os.path.getmtime(html_json_path))
         html_data = data.get('html_data', {})
         
         print(f"✅ Loaded {len(html_data)} fields")
-        
-        # Process all paragraphs
-        print("🔄 Processing paragraphs...")
-        paragraphs_to_process = []
-        
-        for para in self.doc.paragraphs:
-            paragraphs_to_process.append(para)
-        
-        for para in paragraphs_to_process:
-            self._process_paragraph(para, html_data)
-        
-        # Process tables
-        print("🔄 Processing tables...")
-        for table in self.doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        self._process_paragraph(para, html_data)
+
+        if not html_data:
+            # Nothing to substitute - save the template as-is instead of
+            # scanning every paragraph for placeholders we cannot fill
+            print("⚠️  No html_data fields; saving template unchanged")
+            self.doc.save(output_path)
+            return output_path
+
+        # Scan the template's entire text once and drop fields it never
+        # references, so per-paragraph work runs against the smaller
+        # dict. ''.join keeps placeholders split across runs intact.
+        template_text = ''.join(_PARA_TEXT_XPATH(self.doc.element.body))
+        present = set(self._PLACEHOLDER_RE.findall(template_text))
+        html_data = {k: v for k, v in html_data.items() if k in present}
+        print(f"🔎 Template uses {len(present)} placeholder(s); "
+              f"{len(html_data)} matching field(s)")
+
+        # One XPath walk gathers every paragraph - body-level and inside
+        # table cells alike - replacing the old two passes (paragraph
+        # list, then tables → rows → cells → paragraphs, each property
+        # re-walking the XML). The returned list is also the snapshot we
+        # need, since _process_paragraph may remove/insert elements.
+        print("🔄 Processing paragraphs (incl. tables)...")
+        body_proxy = self.doc._body
+        for p_elem in _ALL_PARAS_XPATH(self.doc.element.body):
+            self._process_paragraph(Paragraph(p_elem, body_proxy), html_data)
         
         # Save
         self.doc.save(output_path)
@@ -193,25 +278,40 @@ class WordGenerator:
            - Inherit font/size from original placeholder location
         """
 
-        full_text = paragraph.text
+        # Cheapest reject first: scan the element's text nodes without
+        # joining them (itertext is a C-level generator and short-circuits
+        # on the first brace). '{' rather than '{{' because a placeholder
+        # can be split across runs.
+        elem = paragraph._element
+        if not any('{' in t for t in elem.itertext()):
+            return
+
+        full_text = _para_text(paragraph)
+
+        # Fast reject: most template paragraphs have no placeholders, and
+        # a C-level substring scan is much cheaper than the regex engine
+        if '{{' not in full_text:
+            return
 
         # Check if paragraph contains any placeholders
-        placeholders_found = re.findall(r'\{\{([A-Z_]+)\}\}', full_text)
+        placeholders_found = self._PLACEHOLDER_RE.findall(full_text)
 
         if not placeholders_found:
             return
 
-        print(f"   📌 Found placeholders: {placeholders_found}")
-        print(f"      In text: {full_text[:80]}...")
+        if self.verbose:
+            print(f"   📌 Found placeholders: {placeholders_found}")
+            print(f"      In text: {_snip(full_text)}...")
 
         # Separate simple vs complex placeholders
         simple_placeholders = [p for p in placeholders_found if p in self.SIMPLE_FIELDS]
         complex_placeholders = [p for p in placeholders_found if p not in self.SIMPLE_FIELDS]
 
-        if simple_placeholders:
-            print(f"      🔤 Inline replacement for: {simple_placeholders}")
-        if complex_placeholders:
-            print(f"      📄 HTML replacement for: {complex_placeholders}")
+        if self.verbose:
+            if simple_placeholders:
+                print(f"      🔤 Inline replacement for: {simple_placeholders}")
+            if complex_placeholders:
+                print(f"      📄 HTML replacement for: {complex_placeholders}")
 
         # Handle simple placeholders - INLINE REPLACEMENT
         if simple_placeholders:
@@ -226,53 +326,34 @@ class WordGenerator:
         Replace simple placeholders inline (e.g., {{PO_NO}}-A01 → 210025-28-126-001-A01)
         """
         
-        # Build replacement map
-        replacements = {}
-        for placeholder in placeholders:
-            value = html_data.get(placeholder, f"[{placeholder} NOT FOUND]")
-            placeholder_tag = f"{{{{{placeholder}}}}}"
-            replacements[placeholder_tag] = value
-
-        # Replace all placeholders in the full text
-        modified_text = full_text
-        for placeholder_tag, value in replacements.items():
-            if placeholder_tag in modified_text:
-                modified_text = modified_text.replace(placeholder_tag, value)
-                print(f"         ✓ {placeholder_tag} → {value}")
-
-        # If text changed, rebuild the paragraph runs
+        full_text = _para_text(paragraph)
+
+        # One pass of the class-level alternation over the text instead
+        # of an O(len) str.replace scan per placeholder; matches are
+        # exactly the simple placeholders _process_paragraph classified
+        def repl(match):
+            name = match.group(1)
+            value = str(html_data.get(name, f"[{name} NOT FOUND]"))
+            if self.verbose:
+                tag = self._TAG_CACHE.setdefault(name, '{{' + name + '}}')
+                print(f"         ✓ {tag} → {value}")
+            return value
+
+        modified_text = self._SIMPLE_RE.sub(repl, full_text)
+
+        # If text changed, collapse the paragraph onto its first run
         if modified_text != full_text:
-            # Save the formatting of the first run (if exists)
-            first_run_format = None
-            if paragraph.runs:
-                first_run = paragraph.runs[0]
-                first_run_format = {
-                    'bold': first_run.bold,
-                    'italic': first_run.italic,
-                    'underline': first_run.underline,
-                    'font_name': first_run.font.name,
-                    'font_size': first_run.font.size,
-                }
-
-            # Clear all runs
-            for run in paragraph.runs:
-                run.text = ""
-
-            # Add new run with replaced text
-            new_run = paragraph.add_run(modified_text)
-
-            # Restore formatting
-            if first_run_format:
-                if first_run_format['bold'] is not None:
-                    new_run.bold = first_run_format['bold']
-                if first_run_format['italic'] is not None:
-                    new_run.italic = first_run_format['italic']
-                if first_run_format['underline'] is not None:
-                    new_run.underline = first_run_format['underline']
-                if first_run_format['font_name']:
-                    new_run.font.name = first_run_format['font_name']
-                if first_run_format['font_size']:
-                    new_run.font.size = first_run_format['font_size']
+            runs = paragraph.runs
+            if runs:
+                # The first run keeps its own formatting, so mutating it
+                # in place replaces the old blank-every-run + add_run +
+                # re-apply-format dance with a single XML write
+                runs[0].text = modified_text
+                p_elem = paragraph._element
+                for run in runs[1:]:
+                    p_elem.remove(run._element)
+            else:
+                paragraph.add_run(modified_text)
     
     def _insert_complex_placeholders(self, paragraph, html_data, placeholders):
         """
@@ -288,14 +369,14 @@ class WordGenerator:
         placeholder_index = parent.index(paragraph._element)
 
         # Get full paragraph text to check for placeholders
-        full_text = paragraph.text
+        full_text = _para_text(paragraph)
 
         # Check if paragraph contains ONLY placeholders (should be removed)
         # or has other text (should keep non-placeholder parts)
         has_other_text = False
         temp_text = full_text
         for placeholder in placeholders:
-            placeholder_tag = f"{{{{{placeholder}}}}}"
+            placeholder_tag = self._TAG_CACHE.setdefault(placeholder, '{{' + placeholder + '}}')
             temp_text = temp_text.replace(placeholder_tag, "").strip()
 
         if temp_text:  # Has other text besides placeholders
@@ -309,60 +390,116 @@ class WordGenerator:
             html_content = html_data.get(placeholder, '')
 
             if html_content and html_content != 'null':
-                print(f"         ✓ Inserting HTML for {{{{{placeholder}}}}} with style: {style_info['font_name']}, {style_info['font_size']}")
+                if self.verbose:
+                    tag = self._TAG_CACHE.setdefault(placeholder, '{{' + placeholder + '}}')
+                    print(f"         ✓ Inserting HTML for {tag} with style: {style_info.font_name}, {style_info.font_size}")
 
-                # Create a temporary document to render HTML
-                temp_doc = Document()
+                # Render HTML into the reused scratch document
+                temp_doc = self._get_temp_doc()
                 html_to_word(html_content, temp_doc, style_info)
 
-                # Copy all elements from temp doc to main doc at position
-                for element in temp_doc.element.body:
-                    # Insert after placeholder position
-                    parent.insert(placeholder_index, element)
-                    placeholder_index += 1
+                # Splice all rendered elements in at the position with one
+                # slice assignment instead of k sibling-shifting inserts.
+                # The scratch body's sectPr stays behind - the old loop
+                # moved it too, leaving stray section breaks mid-document.
+                elements = [el for el in temp_doc.element.body
+                            if not el.tag.endswith('}sectPr')]
+                parent[placeholder_index:placeholder_index] = elements
+                placeholder_index += len(elements)
+
+    def _get_temp_doc(self):
+        """
+        Blank scratch Document for HTML rendering
+
+        Document() re-parses the packaged default-template XML on every
+        call, so one instance is kept and its body cleared between uses
+        (inserting the rendered elements into the main document already
+        moves them out; only stragglers like sectPr remain).
+        """
+        temp_doc = self._temp_doc
+        if temp_doc is None:
+            temp_doc = self._temp_doc = Document()
+        else:
+            body = temp_doc.element.body
+            for child in list(body):
+                if not child.tag.endswith('}sectPr'):
+                    body.remove(child)
+        return temp_doc
 
     def _extract_paragraph_style(self, paragraph):
         """
         Extract style information from a paragraph (font, size, etc.)
         """
-        style_info = {
-            'font_name': None,
-            'font_size': None,
-            'bold': False,
-            'italic': False,
-        }
+        font_name = None
+        font_size = None
+        bold = False
+        italic = False
 
         # Get style from first run if available
-        if paragraph.runs:
-            first_run = paragraph.runs[0]
+        runs = paragraph.runs
+        if runs:
+            first_run = runs[0]
             if first_run.font.name:
-                style_info['font_name'] = first_run.font.name
+                font_name = first_run.font.name
             if first_run.font.size:
-                style_info['font_size'] = first_run.font.size
+                font_size = first_run.font.size
             if first_run.bold:
-                style_info['bold'] = first_run.bold
+                bold = first_run.bold
             if first_run.italic:
-                style_info['italic'] = first_run.italic
+                italic = first_run.italic
+
+            # Direct formatting answered everything - skip the
+            # paragraph.style walk through the inheritance chain
+            if font_name and font_size:
+                return RunStyle(font_name, font_size, bold, italic)
 
         # Fallback to paragraph style
-        if not style_info['font_name'] or not style_info['font_size']:
+        if not font_name or not font_size:
             try:
                 para_style = paragraph.style
                 if para_style and para_style.font:
-                    if not style_info['font_name'] and para_style.font.name:
-                        style_info['font_name'] = para_style.font.name
-                    if not style_info['font_size'] and para_style.font.size:
-                        style_info['font_size'] = para_style.font.size
+                    if not font_name and para_style.font.name:
+                        font_name = para_style.font.name
+                    if not font_size and para_style.font.size:
+                        font_size = para_style.font.size
             except:
                 pass
 
-        # Ultimate fallback
-        if not style_info['font_name']:
-            style_info['font_name'] = 'Arial'
-        if not style_info['font_size']:
-            style_info['font_size'] = Pt(11)
-
-        return style_info
+        # Ultimate fallback defaults fill any remaining gaps
+        return RunStyle(font_name or _DEFAULT_FONT_NAME,
+                        font_size or _DEFAULT_FONT_SIZE, bold, italic)
+
+
+def _generate_one(job):
+    """Worker for generate_batch - must be top-level so it pickles"""
+    html_json_path, output_path, template_path = job
+    generator = WordGenerator(template_path)
+    if template_path:
+        return generator.generate_with_template(template_path, html_json_path, output_path)
+    return generator.generate_from_html_json(html_json_path, output_path)
+
+
+def generate_batch(jobs, max_workers=None):
+    """
+    Generate many PO documents in parallel
+
+    Args:
+        jobs: list of (html_json_path, output_path, template_path) tuples
+              (template_path may be None for default mode)
+        max_workers: process count, defaults to os.cpu_count()
+
+    Returns:
+        List of output paths in job order
+    """
+    if len(jobs) <= 1:
+        # Not worth spawning processes for a single document
+        return [_generate_one(job) for job in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        # Default chunksize of 1: jobs are coarse (whole documents), so
+        # batching them would just idle workers
+        return list(executor.map(_generate_one, jobs))
 
 
 # CLI Usage